@@ -5,26 +5,78 @@ Solves the file path issue in TTS generation
 """
 
 import os
+import re
 import sys
 import time
 import logging
+import threading
+import queue
+import hashlib
+import sqlite3
+from collections import OrderedDict, deque
+import contextlib
+from io import BytesIO
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# CPU inference tuning; must be set before the inference libraries load
+os.environ.setdefault("DNNL_DEFAULT_FPMATH_MODE", "BF16")
+os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count() or 4))
+
+# OMP_NUM_THREADS may hold a per-level list such as "8,4"; use the outer level
+try:
+    CPU_THREADS = int(os.environ["OMP_NUM_THREADS"].split(",")[0])
+except ValueError:
+    CPU_THREADS = 0
+if CPU_THREADS <= 0:
+    CPU_THREADS = os.cpu_count() or 4
 
 # Core libraries
 try:
+    import numpy as np
+    import librosa
+    import soundfile as sf
     import yt_dlp
-    import whisper
+    from faster_whisper import WhisperModel, BatchedInferencePipeline
     from deep_translator import GoogleTranslator
     from gtts import gTTS
     from pydub import AudioSegment
+    import requests
+    from requests.adapters import HTTPAdapter
+    import deep_translator.google
+    import gtts.tts
 except ImportError as e:
     print(f"❌ Missing required package: {e}")
     print("Please install: pip install -r requirements.txt")
     sys.exit(1)
 
+# One pooled HTTP session for all translation and TTS requests, so
+# connections (and their TLS handshakes) are reused between calls
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=24))
+
+class _SharedSessionRequests:
+    """Stand-in for the requests module that routes calls through http_session"""
+    
+    def __getattr__(self, name):
+        return getattr(requests, name)
+    
+    def get(self, *args, **kwargs):
+        return http_session.get(*args, **kwargs)
+    
+    def Session(self):
+        # gTTS opens (and closes) a new session per request
+        return contextlib.nullcontext(http_session)
+
+deep_translator.google.requests = _SharedSessionRequests()
+gtts.tts.requests = _SharedSessionRequests()
+
 class FixedYouTubeTranslator:
+    # Whisper model shared by all instances, loaded on first use
+    _MODEL = None
+    
     def __init__(self, output_dir: str = "output", temp_dir: str = "temp"):
         self.output_dir = Path(output_dir)
         self.temp_dir = Path(temp_dir)
@@ -40,10 +92,32 @@ class FixedYouTubeTranslator:
         logging.basicConfig(level=logging.INFO, format='%(message)s')
         self.logger = logging.getLogger(__name__)
         
+        # Persistent translation cache shared across runs and videos
+        self._tcache = sqlite3.connect(str(self.temp_dir / "tcache.sqlite3"), check_same_thread=False)
+        self._tcache.execute(
+            "CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, translated TEXT NOT NULL)"
+        )
+        self._tcache.commit()
+        self._tcache_lock = threading.Lock()
+        self._local = threading.local()
+        
+        # Bounded in-memory tier for same-session hits without disk I/O
+        self._tmemo = OrderedDict()
+        self._tmemo_size = 4096
+        
         # Load Whisper model
         self.logger.info("🤖 Loading Whisper model...")
         try:
-            self.whisper_model = whisper.load_model("base")
+            # CTranslate2 backend with INT8 weights: much faster than the reference model on CPU
+            FixedYouTubeTranslator._MODEL = FixedYouTubeTranslator._MODEL or WhisperModel(
+                "base",
+                device="auto",
+                compute_type="int8",
+                cpu_threads=CPU_THREADS
+            )
+            self.whisper_model = FixedYouTubeTranslator._MODEL
+            # Runs several audio chunks through the model in one forward pass
+            self.batched_model = BatchedInferencePipeline(model=self.whisper_model)
             self.logger.info("✅ Whisper model loaded successfully")
         except Exception as e:
             self.logger.error(f"❌ Failed to load Whisper model: {e}")
@@ -59,6 +133,18 @@ class FixedYouTubeTranslator:
         video_filename = f"{video_id}.%(ext)s"
         video_path = self.temp_dir / video_filename
         
+        # Have yt-dlp extract 16 kHz mono WAV for Whisper as part of the download,
+        # keeping the original video for the final merge
+        postprocess_opts = {
+            'keepvideo': True,
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'wav',
+                'preferredquality': '0'
+            }],
+            'postprocessor_args': {'extractaudio+ffmpeg_o': ['-ar', '16000', '-ac', '1']}
+        }
+        
         # Multiple download strategies
         strategies = [
             # Strategy 1: Best quality MP4
@@ -66,7 +152,8 @@ class FixedYouTubeTranslator:
                 'format': 'best[height<=720][ext=mp4]/best[ext=mp4]/best',
                 'outtmpl': str(video_path),
                 'quiet': True,
-                'no_warnings': True
+                'no_warnings': True,
+                **postprocess_opts
             },
             # Strategy 2: Lower quality, more compatible
             {
@@ -74,47 +161,115 @@ class FixedYouTubeTranslator:
                 'outtmpl': str(video_path),
                 'quiet': True,
                 'no_warnings': True,
-                'http_chunk_size': 10485760
+                'http_chunk_size': 10485760,
+                **postprocess_opts
             },
             # Strategy 3: Any available format
             {
                 'format': 'best/worst',
                 'outtmpl': str(video_path),
                 'quiet': True,
-                'no_warnings': True
+                'no_warnings': True,
+                **postprocess_opts
             }
         ]
         
         actual_video_path = None
+        audio_path = None
         
-        for i, opts in enumerate(strategies):
-            try:
-                self.logger.info(f"🔄 Trying download method {i+1}/3...")
-                
-                with yt_dlp.YoutubeDL(opts) as ydl:
+        # Remember what finished downloading, in case postprocessing fails afterwards
+        downloaded = []
+        
+        def _on_progress(d: Dict):
+            if d.get('status') == 'finished':
+                downloaded.append(d['info_dict'])
+        
+        # One downloader for all strategies so extractors are only set up once
+        with yt_dlp.YoutubeDL(strategies[0]) as ydl:
+            ydl.add_progress_hook(_on_progress)
+            for i, opts in enumerate(strategies):
+                downloaded.clear()
+                try:
+                    self.logger.info(f"🔄 Trying download method {i+1}/3...")
+                    
+                    if i > 0:
+                        # update() only adds keys, so drop options earlier strategies
+                        # set that this one doesn't (e.g. http_chunk_size)
+                        for key in set().union(*strategies) - opts.keys():
+                            ydl.params.pop(key, None)
+                        ydl.params.update(opts)
+                        # The format selector is compiled once in __init__
+                        ydl.format_selector = ydl.build_format_selector(opts['format'])
+                    
                     info = ydl.extract_info(url, download=True)
                     actual_video_path = ydl.prepare_filename(info)
-                
-                # Verify file exists and has size > 0
-                if os.path.exists(actual_video_path) and os.path.getsize(actual_video_path) > 1000:
-                    self.logger.info(f"✅ Download successful: {os.path.basename(actual_video_path)}")
-                    break
-                else:
-                    actual_video_path = None
+                    # The download entry points at the postprocessed WAV
+                    downloads = info.get('requested_downloads') or [{}]
+                    audio_path = downloads[-1].get('filepath')
                     
-            except Exception as e:
-                self.logger.warning(f"⚠️ Method {i+1} failed: {str(e)[:100]}...")
-                actual_video_path = None
-                time.sleep(1)
-                continue
+                    # Verify file exists and has size > 0
+                    if os.path.exists(actual_video_path) and os.path.getsize(actual_video_path) > 1000:
+                        self.logger.info(f"✅ Download successful: {os.path.basename(actual_video_path)}")
+                        break
+                    else:
+                        actual_video_path = None
+                        
+                except Exception as e:
+                    # Only the WAV extraction failed: keep the video and extract separately
+                    if downloaded and isinstance(e, yt_dlp.utils.DownloadError) and e.exc_info \
+                            and e.exc_info[0] and issubclass(e.exc_info[0], yt_dlp.utils.PostProcessingError):
+                        actual_video_path = ydl.prepare_filename(downloaded[-1])
+                        audio_path = None
+                        if os.path.exists(actual_video_path) and os.path.getsize(actual_video_path) > 1000:
+                            self.logger.warning(f"⚠️ Audio extraction during download failed: {str(e)[:100]}...")
+                            self.logger.info(f"✅ Download successful: {os.path.basename(actual_video_path)}")
+                            break
+                    
+                    self.logger.warning(f"⚠️ Method {i+1} failed: {str(e)[:100]}...")
+                    actual_video_path = None
+                    if self._is_fatal_download_error(e):
+                        self.logger.error("❌ Video cannot be downloaded, skipping remaining methods")
+                        break
+                    time.sleep(1)
+                    continue
         
         if not actual_video_path:
             self.logger.error("❌ All download methods failed")
             return None, None
         
-        # Extract audio
+        if audio_path and audio_path.endswith('.wav') and os.path.exists(audio_path) \
+                and os.path.getsize(audio_path) > 1000:
+            self.logger.info(f"✅ Audio extracted during download ({os.path.getsize(audio_path) // 1024} KB)")
+            return actual_video_path, audio_path
+        
+        # Fall back to a separate extraction pass
         return self._extract_audio_robust(actual_video_path, video_id)
     
+    @staticmethod
+    def _is_fatal_download_error(error: Exception) -> bool:
+        """True if no other download strategy can succeed (private, removed, geo-blocked)"""
+        if not isinstance(error, yt_dlp.utils.DownloadError):
+            return False
+        
+        # Walk the cause chain yt-dlp attaches to the DownloadError
+        causes = []
+        cause = error.exc_info[1] if error.exc_info else None
+        while cause is not None and cause not in causes:
+            causes.append(cause)
+            cause = getattr(cause, 'cause', None) or cause.__cause__ or cause.__context__
+        
+        for cause in causes:
+            # Server errors and rate limiting are worth retrying
+            status = getattr(cause, 'status', None) or getattr(cause, 'code', None)
+            if isinstance(status, int) and (status == 429 or status >= 500):
+                return False
+        
+        if any(isinstance(cause, yt_dlp.utils.GeoRestrictedError) for cause in causes):
+            return True
+        
+        message = str(error)
+        return "Private video" in message or "Video unavailable" in message
+    
     def _extract_audio_robust(self, video_path: str, video_id: str) -> Tuple[Optional[str], Optional[str]]:
         """Robust audio extraction with error handling"""
         self.logger.info("🎵 Extracting audio...")
@@ -173,7 +328,7 @@ class FixedYouTubeTranslator:
         return None, None
     
     def transcribe_audio(self, audio_path: str) -> Optional[Dict]:
-        """Transcribe audio using Whisper"""
+        """Transcribe audio using Whisper; segments are yielded as they are decoded"""
         self.logger.info("🎤 Transcribing speech to text...")
         
         try:
@@ -185,169 +340,348 @@ class FixedYouTubeTranslator:
             if duration_seconds > 600:  # 10 minutes
                 self.logger.warning("⚠️ Long audio detected. This may take a while...")
             
-            # Transcribe with Whisper
-            result = self.whisper_model.transcribe(
+            # Transcribe with Whisper. The batched pipeline defaults to
+            # without_timestamps=True, which returns one segment per ~30 s VAD
+            # chunk; dubbing needs phrase-level segments. A small batch keeps
+            # the first segments flowing to translation early.
+            segments_iter, info = self.batched_model.transcribe(
                 audio_path,
+                batch_size=4,
+                without_timestamps=False,
                 word_timestamps=True,
-                verbose=False
+                vad_filter=True
             )
             
-            segments_count = len(result.get('segments', []))
-            detected_language = result.get('language', 'unknown')
+            # Language is detected up front; segments are decoded lazily,
+            # so later stages can start on them while Whisper keeps going
+            def _iter_segments() -> Iterator[Dict]:
+                segments_count = 0
+                for s in segments_iter:
+                    segments_count += 1
+                    yield {'text': s.text, 'start': s.start, 'end': s.end}
+                
+                self.logger.info(f"✅ Transcription complete!")
+                self.logger.info(f"   Speech segments: {segments_count}")
             
-            self.logger.info(f"✅ Transcription complete!")
-            self.logger.info(f"   Language detected: {detected_language}")
-            self.logger.info(f"   Speech segments: {segments_count}")
+            self.logger.info(f"   Language detected: {info.language}")
             
-            return result
+            return {
+                'segments': _iter_segments(),
+                'language': info.language
+            }
             
         except Exception as e:
             self.logger.error(f"❌ Transcription failed: {e}")
             return None
     
-    def translate_segments(self, segments: List[Dict], target_language: str) -> List[Dict]:
+    def translate_segments(self, segments: List[Dict], target_language: str,
+                           source_language: str = 'auto') -> List[Dict]:
         """Translate all segments to target language"""
         self.logger.info(f"🌐 Translating to {target_language}...")
         
-        translated_segments = []
-        successful_translations = 0
+        self.logger.info(f"   Translating {len(segments)} segments...")
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            translated_segments = self._translate_segment_batch(
+                segments, target_language, source_language, executor
+            )
+        successful_translations = sum(
+            seg['translated'] != seg['original'] for seg in translated_segments
+        )
         
-        for i, segment in enumerate(segments):
-            original_text = segment.get('text', '').strip()
-            if not original_text:
-                continue
-            
-            # Progress indicator
-            if i % 10 == 0 or i == len(segments) - 1:
-                progress = (i + 1) / len(segments) * 100
-                self.logger.info(f"   Translating segment {i+1}/{len(segments)} ({progress:.0f}%)")
-            
+        self.logger.info(f"✅ Translation complete! ({successful_translations}/{len(segments)} successful)")
+        return translated_segments
+    
+    def _translate_segment_batch(self, segments: List[Dict], target_language: str,
+                                 source_language: str = 'auto',
+                                 executor: Optional[ThreadPoolExecutor] = None) -> List[Dict]:
+        """Translate non-empty segments, keeping their timings"""
+        segments = [seg for seg in segments if seg.get('text', '').strip()]
+        texts = [seg['text'].strip() for seg in segments]
+        results = self._translate_batch(texts, target_language, source_language, executor=executor)
+        
+        return [
+            {
+                'original': original_text,
+                'translated': translated_text,
+                'start': segment.get('start', 0),
+                'end': segment.get('end', 0)
+            }
+            for segment, original_text, translated_text in zip(segments, texts, results)
+        ]
+    
+    def _get_translator(self, target_language: str, source_language: str = 'auto') -> GoogleTranslator:
+        """Return this thread's reusable translator for the language pair"""
+        # GoogleTranslator keeps per-request state on the instance,
+        # so instances must not be shared between threads
+        translators = self._local.__dict__.setdefault('translators', {})
+        key = (source_language, target_language)
+        if key not in translators:
             try:
-                # Translate text
-                translator = GoogleTranslator(source='auto', target=target_language)
-                translated_text = translator.translate(original_text)
+                translators[key] = GoogleTranslator(source=source_language, target=target_language)
+            except Exception:
+                # Whisper and Google use different codes for a few languages (e.g. zh, he)
+                translators[key] = GoogleTranslator(source='auto', target=target_language)
+        return translators[key]
+    
+    @staticmethod
+    def _cache_key(text: str, target_language: str, source_language: str) -> str:
+        # The pinned source is part of the key so a misdetected language
+        # can't poison results for correctly detected runs
+        return hashlib.sha1(f"{source_language}|{target_language}|{text}".encode()).hexdigest()
+    
+    def _cache_lookup(self, text: str, target_language: str, source_language: str = 'auto') -> Optional[str]:
+        """Return a translation from the on-disk cache, if present"""
+        key = self._cache_key(text, target_language, source_language)
+        with self._tcache_lock:
+            row = self._tcache.execute(
+                "SELECT translated FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def _cache_store(self, translations: Dict[str, str], target_language: str, source_language: str = 'auto'):
+        """Save translations to the on-disk cache in a single transaction"""
+        rows = [
+            (self._cache_key(text, target_language, source_language), translated_text)
+            for text, translated_text in translations.items()
+        ]
+        with self._tcache_lock:
+            self._tcache.executemany(
+                "INSERT OR REPLACE INTO translations (key, translated) VALUES (?, ?)",
+                rows
+            )
+            self._tcache.commit()
+    
+    def _memo_get(self, text: str, target_language: str, source_language: str) -> Optional[str]:
+        """Return a translation from the in-memory cache, if present"""
+        key = (source_language, target_language, text)
+        with self._tcache_lock:
+            if key not in self._tmemo:
+                return None
+            self._tmemo.move_to_end(key)
+            return self._tmemo[key]
+    
+    def _memo_put(self, text: str, target_language: str, source_language: str, translated_text: str):
+        """Remember a translation in memory, evicting the least recently used"""
+        with self._tcache_lock:
+            self._tmemo[(source_language, target_language, text)] = translated_text
+            if len(self._tmemo) > self._tmemo_size:
+                self._tmemo.popitem(last=False)
+    
+    def _translate_cached(self, text: str, target_language: str, source_language: str = 'auto') -> str:
+        """Translate text, reusing results from the in-memory and on-disk caches"""
+        cached = self._memo_get(text, target_language, source_language)
+        if cached is not None:
+            return cached
+        
+        cached = self._cache_lookup(text, target_language, source_language)
+        if cached is None:
+            translated_text = self._get_translator(target_language, source_language).translate(text)
+            if not translated_text:
+                return text
+            self._cache_store({text: translated_text}, target_language, source_language)
+            cached = translated_text
+        
+        self._memo_put(text, target_language, source_language, cached)
+        return cached
+    
+    def _translate_batch(self, texts: List[str], target_language: str, source_language: str = 'auto',
+                         batch_size: int = 50, max_chars: int = 4500,
+                         executor: Optional[ThreadPoolExecutor] = None) -> List[str]:
+        """Translate texts in order, sending many of them per request
+        
+        Chunks run concurrently on ``executor`` if one is given, otherwise
+        on the calling thread.
+        """
+        # Only unique texts missing from both caches need a request
+        translations = {}
+        pending = []
+        for text in dict.fromkeys(texts):
+            cached = self._memo_get(text, target_language, source_language)
+            if cached is None:
+                cached = self._cache_lookup(text, target_language, source_language)
+                if cached is not None:
+                    self._memo_put(text, target_language, source_language, cached)
+            if cached is None:
+                pending.append(text)
+            else:
+                translations[text] = cached
+        
+        # Group pending texts into chunks that fit in a single request
+        chunks = []
+        chunk, chunk_chars = [], 0
+        for text in pending:
+            if chunk and (len(chunk) >= batch_size or chunk_chars + len(text) > max_chars):
+                chunks.append(chunk)
+                chunk, chunk_chars = [], 0
+            chunk.append(text)
+            chunk_chars += len(text) + 1
+        if chunk:
+            chunks.append(chunk)
+        
+        def _translate_one(text: str) -> str:
+            try:
+                return self._translate_cached(text, target_language, source_language)
+            except Exception as e:
+                self.logger.warning(f"⚠️ Translation failed for \"{text[:30]}\": {str(e)[:50]}...")
+                # Keep original text as fallback
+                return text
+        
+        def _translate_chunk(chunk: List[str]) -> List[str]:
+            try:
+                # One line per segment; Google keeps line breaks intact
+                translated = self._get_translator(target_language, source_language).translate("\n".join(chunk))
+                lines = translated.split("\n") if translated else []
+                if len(lines) != len(chunk):
+                    raise ValueError(f"expected {len(chunk)} lines, got {len(lines)}")
+                
+                # Only persist lines that actually came back translated
+                translated_lines = {
+                    text: line.strip() for text, line in zip(chunk, lines) if line.strip()
+                }
+                self._cache_store(translated_lines, target_language, source_language)
+                for text, translated_text in translated_lines.items():
+                    self._memo_put(text, target_language, source_language, translated_text)
                 
-                if translated_text and translated_text != original_text:
-                    successful_translations += 1
-                    translated_segments.append({
-                        'original': original_text,
-                        'translated': translated_text,
-                        'start': segment.get('start', 0),
-                        'end': segment.get('end', 0)
-                    })
-                else:
-                    # Keep original if translation failed
-                    translated_segments.append({
-                        'original': original_text,
-                        'translated': original_text,
-                        'start': segment.get('start', 0),
-                        'end': segment.get('end', 0)
-                    })
+                # Blank lines get a second chance through the per-item path
+                return [
+                    translated_lines[text] if text in translated_lines else _translate_one(text)
+                    for text in chunk
+                ]
                 
             except Exception as e:
-                self.logger.warning(f"⚠️ Translation failed for segment {i+1}: {str(e)[:50]}...")
-                # Keep original text as fallback
-                translated_segments.append({
-                    'original': original_text,
-                    'translated': original_text,
-                    'start': segment.get('start', 0),
-                    'end': segment.get('end', 0)
-                })
+                self.logger.warning(f"⚠️ Batch translation failed, retrying per segment: {str(e)[:50]}...")
+                return [_translate_one(text) for text in chunk]
         
-        self.logger.info(f"✅ Translation complete! ({successful_translations}/{len(segments)} successful)")
-        return translated_segments
+        # Requests are I/O-bound, so run them concurrently; map() preserves order
+        chunk_results = executor.map(_translate_chunk, chunks) if executor else map(_translate_chunk, chunks)
+        for chunk, results in zip(chunks, chunk_results):
+            translations.update(zip(chunk, results))
+        
+        return [translations[text] for text in texts]
     
-    def create_translated_audio_fixed(self, translated_segments: List[Dict], target_language: str, video_id: str) -> Optional[str]:
+    def create_translated_audio_fixed(self, translated_segments: Iterable[Dict], target_language: str, video_id: str) -> Optional[str]:
         """FIXED: Create translated audio track with proper file handling"""
         self.logger.info("🎙️ Generating translated speech...")
         
-        if not translated_segments:
-            self.logger.error("❌ No segments to process")
-            return None
-        
         try:
-            # Calculate total duration
-            total_duration = max(seg['end'] for seg in translated_segments) * 1000  # Convert to ms
-            final_audio = AudioSegment.silent(duration=int(total_duration))
-            
-            successful_segments = 0
-            
-            for i, segment in enumerate(translated_segments):
-                translated_text = segment['translated'].strip()
-                if not translated_text:
-                    continue
-                
+            def _synth(i: int, translated_text: str) -> Optional[AudioSegment]:
                 # Progress indicator
-                if i % 5 == 0 or i == len(translated_segments) - 1:
-                    progress = (i + 1) / len(translated_segments) * 100
-                    self.logger.info(f"   Processing speech {i+1}/{len(translated_segments)} ({progress:.0f}%)")
+                if i % 5 == 0:
+                    self.logger.info(f"   Processing speech {i+1}...")
                 
+                # Generate speech in memory, no temp files needed
                 try:
-                    # FIXED: Use absolute path and ensure directory exists
-                    temp_speech_file = self.temp_dir / f"speech_{i:04d}.mp3"
+                    tts = gTTS(
+                        text=translated_text,
+                        lang=target_language,
+                        slow=False
+                    )
+                    buffer = BytesIO()
+                    tts.write_to_fp(buffer)
                     
-                    # Ensure temp directory exists
-                    temp_speech_file.parent.mkdir(parents=True, exist_ok=True)
+                    if buffer.tell() == 0:
+                        self.logger.warning(f"⚠️ TTS audio not created for segment {i+1}")
+                        return None
+                    buffer.seek(0)
                     
-                    # Generate speech with error handling
-                    try:
-                        tts = gTTS(
-                            text=translated_text,
-                            lang=target_language,
-                            slow=False
-                        )
-                        
-                        # Save with absolute path
-                        tts.save(str(temp_speech_file.resolve()))
-                        
-                        # Verify file was created
-                        if not temp_speech_file.exists() or temp_speech_file.stat().st_size == 0:
-                            self.logger.warning(f"⚠️ TTS file not created for segment {i+1}")
-                            continue
-                            
-                    except Exception as tts_error:
-                        self.logger.warning(f"⚠️ TTS generation failed for segment {i+1}: {tts_error}")
-                        continue
+                except Exception as tts_error:
+                    self.logger.warning(f"⚠️ TTS generation failed for segment {i+1}: {tts_error}")
+                    return None
+                
+                # Load generated speech
+                try:
+                    return AudioSegment.from_file(buffer, format="mp3")
+                except Exception as load_error:
+                    self.logger.warning(f"⚠️ Failed to load TTS audio for segment {i+1}: {load_error}")
+                    return None
+            
+            # TTS requests are I/O-bound and independent, so synthesize concurrently,
+            # starting on each segment as soon as it arrives
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                segments = []
+                futures = []
+                # Repeated texts reuse the clip already being synthesized
+                tts_cache = {}
+                for i, segment in enumerate(translated_segments):
+                    segments.append(segment)
+                    translated_text = segment['translated'].strip()
                     
-                    # Load generated speech
-                    try:
-                        speech_audio = AudioSegment.from_mp3(str(temp_speech_file))
-                    except Exception as load_error:
-                        self.logger.warning(f"⚠️ Failed to load TTS audio for segment {i+1}: {load_error}")
-                        temp_speech_file.unlink(missing_ok=True)
+                    # Nothing to speak for empty or punctuation-only text
+                    if not translated_text or re.fullmatch(r"[\W_]+", translated_text):
+                        futures.append(None)
                         continue
                     
+                    key = (translated_text, target_language)
+                    if key not in tts_cache:
+                        tts_cache[key] = executor.submit(_synth, i, translated_text)
+                    futures.append(tts_cache[key])
+                
+                results = [
+                    (i, future.result() if future else None)
+                    for i, future in enumerate(futures)
+                ]
+            
+            if not segments:
+                self.logger.error("❌ No segments to process")
+                return None
+            translated_segments = segments
+            
+            # Segment timings as arrays, reused for positioning below
+            starts = np.fromiter((seg['start'] for seg in translated_segments), dtype=np.float64, count=len(translated_segments))
+            ends = np.fromiter((seg['end'] for seg in translated_segments), dtype=np.float64, count=len(translated_segments))
+            
+            # Calculate total duration
+            total_duration = ends.max() * 1000  # Convert to ms
+            
+            # Mix into one preallocated buffer at gTTS's native rate; int32 avoids
+            # overflow where clips overlap
+            sample_rate = 24000
+            mix = np.zeros(int(total_duration * sample_rate / 1000), dtype=np.int32)
+            
+            successful_segments = 0
+            
+            # Overlay in segment order once all speech is ready
+            for i, speech_audio in results:
+                if speech_audio is None:
+                    continue
+                
+                try:
                     # Calculate timing
-                    start_ms = int(segment['start'] * 1000)
-                    end_ms = int(segment['end'] * 1000)
-                    segment_duration = end_ms - start_ms
+                    start_ms = int(starts[i] * 1000)
+                    end_ms = int(ends[i] * 1000)
+                    segment_samples = (end_ms - start_ms) * sample_rate // 1000
+                    
+                    # Convert once to float samples; all further processing is vectorized
+                    speech_audio = speech_audio.set_frame_rate(sample_rate).set_channels(1).set_sample_width(2)
+                    samples = np.array(speech_audio.get_array_of_samples(), dtype=np.float32) / 32768
                     
                     # Adjust speech timing
-                    if len(speech_audio) > segment_duration and segment_duration > 0:
+                    if len(samples) > segment_samples and segment_samples > 0:
                         # Speed up if too long
-                        speed_factor = len(speech_audio) / segment_duration
+                        speed_factor = len(samples) / segment_samples
                         if speed_factor <= 3.0:  # Reasonable speed limit
-                            speech_audio = speech_audio.speedup(playback_speed=speed_factor)
+                            samples = librosa.effects.time_stretch(samples, rate=speed_factor)
                         else:
                             # Cut if speed would be too extreme
-                            speech_audio = speech_audio[:segment_duration]
+                            samples = samples[:segment_samples]
                     
-                    elif len(speech_audio) < segment_duration:
+                    elif len(samples) < segment_samples:
                         # Add silence if too short
-                        silence_needed = segment_duration - len(speech_audio)
-                        speech_audio = speech_audio + AudioSegment.silent(duration=silence_needed)
+                        samples = np.pad(samples, (0, segment_samples - len(samples)))
                     
                     # Add fade for smoother transitions
-                    if len(speech_audio) > 100:
-                        speech_audio = speech_audio.fade_in(50).fade_out(50)
+                    fade_samples = 50 * sample_rate // 1000
+                    if len(samples) > 2 * fade_samples:
+                        samples[:fade_samples] *= np.linspace(0, 1, fade_samples)
+                        samples[-fade_samples:] *= np.linspace(1, 0, fade_samples)
                     
-                    # Overlay onto final track
-                    final_audio = final_audio.overlay(speech_audio, position=start_ms)
+                    # Add samples onto final track
+                    samples = (samples * 32768).astype(np.int32)
+                    offset = start_ms * sample_rate // 1000
+                    samples = samples[:max(len(mix) - offset, 0)]
+                    mix[offset:offset + len(samples)] += samples
                     successful_segments += 1
                     
-                    # Clean up temp file
-                    temp_speech_file.unlink(missing_ok=True)
-                    
                 except Exception as e:
                     self.logger.warning(f"⚠️ Speech processing failed for segment {i+1}: {str(e)[:100]}...")
                     continue
@@ -360,7 +694,9 @@ class FixedYouTubeTranslator:
             final_audio_path = self.temp_dir / f"{video_id}_final_audio.wav"
             final_audio_path.parent.mkdir(parents=True, exist_ok=True)
             
-            final_audio.export(str(final_audio_path.resolve()), format="wav")
+            # Written directly by libsndfile, no ffmpeg subprocess
+            mix_int16 = np.clip(mix, -32768, 32767).astype(np.int16)
+            sf.write(str(final_audio_path.resolve()), mix_int16, sample_rate, subtype='PCM_16')
             
             # Verify final audio was created
             if not final_audio_path.exists() or final_audio_path.stat().st_size == 0:
@@ -374,17 +710,156 @@ class FixedYouTubeTranslator:
             self.logger.error(f"❌ Audio creation failed: {e}")
             return None
     
+    def _run_dubbing_pipeline(self, transcription: Dict, target_language: str, video_id: str) -> Optional[str]:
+        """Overlap transcription, translation and TTS using bounded queues"""
+        segment_queue = queue.Queue(maxsize=32)
+        translated_queue = queue.Queue(maxsize=32)
+        # Set when any stage stops early, so the others don't block on a queue forever
+        stop = threading.Event()
+        errors = []
+        
+        # Whisper already detected the language, so Google doesn't need to
+        source_language = transcription.get('language') or 'auto'
+        
+        def _put(q: queue.Queue, item: Optional[Dict]) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def _transcribe_stage():
+            try:
+                for segment in transcription['segments']:
+                    if not _put(segment_queue, segment):
+                        break
+            except Exception as e:
+                errors.append(f"Transcription failed: {e}")
+                stop.set()
+            finally:
+                _put(segment_queue, None)
+        
+        def _translate_stage():
+            self.logger.info(f"🌐 Translating to {target_language}...")
+            total = successful = 0
+            pending = deque()
+            
+            def _emit(wait: bool):
+                # Pass finished batches downstream, keeping segment order
+                nonlocal total, successful
+                while pending and (wait or pending[0].done()):
+                    for translated in pending.popleft().result():
+                        total += 1
+                        successful += translated['translated'] != translated['original']
+                        if not _put(translated_queue, translated):
+                            return
+            
+            try:
+                # One pool for the whole stage, so worker threads and their
+                # translators are reused across batches
+                with ThreadPoolExecutor(max_workers=16) as executor:
+                    done = False
+                    while not done and not stop.is_set():
+                        try:
+                            segment = segment_queue.get(timeout=0.1)
+                        except queue.Empty:
+                            _emit(wait=False)
+                            continue
+                        if segment is None:
+                            break
+                        
+                        # Take whatever else is already waiting, up to one request's worth
+                        batch = [segment]
+                        while len(batch) < 50:
+                            try:
+                                segment = segment_queue.get_nowait()
+                            except queue.Empty:
+                                break
+                            if segment is None:
+                                done = True
+                                break
+                            batch.append(segment)
+                        
+                        pending.append(executor.submit(
+                            self._translate_segment_batch, batch, target_language, source_language
+                        ))
+                        _emit(wait=False)
+                    
+                    _emit(wait=True)
+                
+                if not stop.is_set():
+                    self.logger.info(f"✅ Translation complete! ({successful}/{total} successful)")
+            except Exception as e:
+                errors.append(f"Translation failed: {e}")
+                stop.set()
+            finally:
+                _put(translated_queue, None)
+        
+        def _translated_stream() -> Iterator[Dict]:
+            while not stop.is_set():
+                try:
+                    segment = translated_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if segment is None:
+                    return
+                yield segment
+        
+        stages = [
+            threading.Thread(target=_transcribe_stage, daemon=True),
+            threading.Thread(target=_translate_stage, daemon=True)
+        ]
+        for stage in stages:
+            stage.start()
+        
+        try:
+            # TTS consumes translated segments on this thread as they arrive
+            translated_audio_path = self.create_translated_audio_fixed(
+                _translated_stream(),
+                target_language,
+                video_id
+            )
+        finally:
+            # Upstream stages are either finished or must stop now
+            stop.set()
+            for stage in stages:
+                stage.join()
+        
+        if errors:
+            for error in errors:
+                self.logger.error(f"❌ {error}")
+            return None
+        
+        return translated_audio_path
+    
     def merge_video_audio(self, video_path: str, audio_path: str, output_path: str) -> bool:
         """Merge translated audio with original video"""
         self.logger.info("🎬 Creating final translated video...")
         
         try:
+            # AAC audio can go into the container as-is; anything else is encoded.
+            # The pipeline always passes the WAV from create_translated_audio_fixed,
+            # so the copy branch (and its ffprobe call) only runs for external callers
+            aac_audio_inputs = ('.aac', '.m4a', '.mp4', '.m4v', '.mov', '.mkv')
+            aac_output_containers = ('.mp4', '.m4v', '.mov', '.mkv')
+            if Path(audio_path).suffix.lower() in aac_audio_inputs and \
+                    Path(output_path).suffix.lower() in aac_output_containers and \
+                    self._probe_audio_codec(audio_path) == 'aac':
+                audio_codec = ['-c:a', 'copy']
+            else:
+                audio_codec = ['-c:a', 'aac', '-b:a', '128k']
+            
+            # Only errors are written to stderr, so nothing large gets buffered
             subprocess.run([
-                'ffmpeg', '-i', video_path, '-i', audio_path,
-                '-c:v', 'copy', '-c:a', 'aac', '-b:a', '128k',
+                'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                '-i', video_path, '-i', audio_path,
+                '-c:v', 'copy', *audio_codec,
                 '-map', '0:v:0', '-map', '1:a:0',
+                '-movflags', '+faststart',
                 output_path, '-y'
-            ], capture_output=True, check=True, timeout=300)
+            ], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True, timeout=300)
             
             # Verify output file
             if os.path.exists(output_path) and os.path.getsize(output_path) > 1000:
@@ -396,7 +871,8 @@ class FixedYouTubeTranslator:
                 return False
                 
         except subprocess.CalledProcessError as e:
-            self.logger.error(f"❌ Video merging failed: FFmpeg error")
+            stderr = e.stderr.decode(errors='replace').strip() if e.stderr else ''
+            self.logger.error(f"❌ Video merging failed: FFmpeg error {stderr[-200:]}".rstrip())
             return False
         except subprocess.TimeoutExpired:
             self.logger.error("❌ Video merging timed out")
@@ -405,15 +881,28 @@ class FixedYouTubeTranslator:
             self.logger.error(f"❌ Video merging failed: {e}")
             return False
     
+    def _probe_audio_codec(self, audio_path: str) -> Optional[str]:
+        """Return the codec name of the first audio stream, if it can be probed"""
+        try:
+            result = subprocess.run([
+                'ffprobe', '-v', 'error', '-select_streams', 'a:0',
+                '-show_entries', 'stream=codec_name', '-of', 'csv=p=0',
+                audio_path
+            ], capture_output=True, text=True, check=True, timeout=30)
+            return result.stdout.strip() or None
+        except Exception:
+            return None
+    
     def _clean_temp_files(self, video_id: str):
         """Clean up temporary files"""
-        patterns = [f"{video_id}*", f"*{video_id}*", "speech_*.mp3"]
-        for pattern in patterns:
-            for file_path in self.temp_dir.glob(pattern):
-                try:
-                    file_path.unlink()
-                except:
-                    pass
+        # Single directory pass; every temp file for this video contains its ID
+        with os.scandir(self.temp_dir) as entries:
+            for entry in entries:
+                if video_id in entry.name:
+                    try:
+                        os.unlink(entry.path)
+                    except:
+                        pass
     
     def translate_video(self, url: str, target_language: str, video_name: str = None) -> Optional[str]:
         """Complete video translation pipeline"""
@@ -435,25 +924,16 @@ class FixedYouTubeTranslator:
             if not video_path or not audio_path:
                 return None
             
-            # Step 2: Transcribe audio
+            # Step 2: Start transcribing audio
             transcription = self.transcribe_audio(audio_path)
-            if not transcription or not transcription.get('segments'):
-                self.logger.error("❌ No speech segments found in audio")
+            if not transcription:
                 return None
             
-            # Step 3: Translate segments
-            translated_segments = self.translate_segments(
-                transcription['segments'], 
-                target_language
-            )
-            if not translated_segments:
-                self.logger.error("❌ No segments translated successfully")
-                return None
-            
-            # Step 4: Create translated audio (FIXED VERSION)
-            translated_audio_path = self.create_translated_audio_fixed(
-                translated_segments, 
-                target_language, 
+            # Steps 3-4: Translate segments and create translated audio,
+            # pipelined with transcription so the stages overlap
+            translated_audio_path = self._run_dubbing_pipeline(
+                transcription,
+                target_language,
                 video_id
             )
             if not translated_audio_path:
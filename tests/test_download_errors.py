@@ -0,0 +1,71 @@
+"""
+Tests for deciding when a failed download should skip the remaining strategies
+"""
+
+import importlib
+import io
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Models and network services are never exercised here; stand in for any
+# heavy dependency that isn't installed so the module can be imported
+for _name in ("numpy", "librosa", "soundfile", "yt_dlp", "faster_whisper",
+              "deep_translator", "deep_translator.google", "gtts", "gtts.tts",
+              "pydub", "requests", "requests.adapters"):
+    try:
+        importlib.import_module(_name)
+    except ImportError:
+        sys.modules[_name] = mock.MagicMock()
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import complete_working_translator as cwt  # noqa: E402
+
+yt_dlp = cwt.yt_dlp
+
+
+def _download_error(cause):
+    """Wrap ``cause`` the way YoutubeDL.trouble() reports it"""
+    try:
+        raise cause
+    except Exception:
+        return yt_dlp.utils.DownloadError(f"ERROR: {cause}", sys.exc_info())
+
+
+def _http_error(status):
+    from yt_dlp.networking import Response
+    from yt_dlp.networking.exceptions import HTTPError
+    return HTTPError(Response(io.BytesIO(), "https://example.com", {}, status=status))
+
+
+@unittest.skipIf(isinstance(yt_dlp, mock.MagicMock), "yt-dlp is not installed")
+class FatalDownloadErrorTest(unittest.TestCase):
+    is_fatal = staticmethod(cwt.FixedYouTubeTranslator._is_fatal_download_error)
+
+    def test_geo_restriction_is_fatal(self):
+        error = _download_error(yt_dlp.utils.GeoRestrictedError("blocked in your region"))
+        self.assertTrue(self.is_fatal(error))
+
+    def test_private_and_removed_videos_are_fatal(self):
+        for message in ("[youtube] abc: Private video. Sign in if you've been granted access",
+                        "[youtube] abc: Video unavailable"):
+            with self.subTest(message=message):
+                error = _download_error(yt_dlp.utils.ExtractorError(message, expected=True))
+                self.assertTrue(self.is_fatal(error))
+
+    def test_server_errors_and_rate_limits_are_retried(self):
+        for status in (429, 503):
+            with self.subTest(status=status):
+                http = _http_error(status)
+                wrapped = yt_dlp.utils.ExtractorError("Video unavailable", cause=http)
+                self.assertFalse(self.is_fatal(_download_error(http)))
+                self.assertFalse(self.is_fatal(_download_error(wrapped)))
+
+    def test_other_errors_are_retried(self):
+        self.assertFalse(self.is_fatal(_download_error(OSError("connection reset"))))
+        self.assertFalse(self.is_fatal(RuntimeError("Private video")))
+
+
+if __name__ == "__main__":
+    unittest.main()
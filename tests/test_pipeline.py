@@ -0,0 +1,124 @@
+"""
+Tests for the threaded transcribe -> translate -> TTS pipeline
+"""
+
+import importlib
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Models and network services are never exercised here; stand in for any
+# heavy dependency that isn't installed so the module can be imported
+for _name in ("numpy", "librosa", "soundfile", "yt_dlp", "faster_whisper",
+              "deep_translator", "deep_translator.google", "gtts", "gtts.tts",
+              "pydub", "requests", "requests.adapters"):
+    try:
+        importlib.import_module(_name)
+    except ImportError:
+        sys.modules[_name] = mock.MagicMock()
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import complete_working_translator as cwt  # noqa: E402
+
+
+class _UpperTranslator:
+    def translate(self, text):
+        return text.upper()
+
+
+def _segments(count, delay=0.0):
+    for i in range(count):
+        if delay:
+            time.sleep(delay)
+        yield {'text': f"segment {i}", 'start': float(i), 'end': i + 0.5}
+
+
+class PipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(cwt, "BatchedInferencePipeline")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cwt.FixedYouTubeTranslator._MODEL = mock.MagicMock()
+        self.translator = cwt.FixedYouTubeTranslator(
+            output_dir=f"{self.tmp.name}/output", temp_dir=f"{self.tmp.name}/temp"
+        )
+        self.translator._get_translator = lambda *args: _UpperTranslator()
+
+    def tearDown(self):
+        self.translator._tcache.close()
+        self.tmp.cleanup()
+
+    def _run(self, transcription, timeout=10):
+        """Run the pipeline in a thread and fail instead of hanging"""
+        result = {}
+        worker = threading.Thread(
+            target=lambda: result.setdefault(
+                'path', self.translator._run_dubbing_pipeline(transcription, 'es', 'vid')
+            ),
+            daemon=True
+        )
+        worker.start()
+        worker.join(timeout)
+        self.assertFalse(worker.is_alive(), "pipeline hung")
+        return result['path']
+
+    def test_segments_reach_tts_translated_and_in_order(self):
+        received = []
+
+        def fake_tts(stream, target_language, video_id):
+            received.extend(stream)
+            return "final.wav"
+
+        self.translator.create_translated_audio_fixed = fake_tts
+        path = self._run({'segments': _segments(120, delay=0.001), 'language': 'en'})
+
+        self.assertEqual(path, "final.wav")
+        self.assertEqual([seg['start'] for seg in received], [float(i) for i in range(120)])
+        self.assertEqual(received[7]['translated'], "SEGMENT 7")
+
+    def test_translate_failure_does_not_hang(self):
+        def locked(*args):
+            raise sqlite3.OperationalError("database is locked")
+
+        self.translator._cache_lookup = locked
+        self.translator.create_translated_audio_fixed = lambda stream, *args: list(stream) and None
+
+        self.assertIsNone(self._run({'segments': _segments(200), 'language': 'en'}))
+
+    def test_tts_stopping_early_does_not_hang(self):
+        def stop_after_first(stream, *args):
+            next(iter(stream))
+            return None
+
+        self.translator.create_translated_audio_fixed = stop_after_first
+
+        self.assertIsNone(self._run({'segments': _segments(200), 'language': 'en'}))
+
+    def test_transcription_failure_is_reported(self):
+        def broken():
+            yield from _segments(200)
+            raise RuntimeError("decoder crashed")
+
+        received = []
+
+        def slow_tts(stream, *args):
+            for segment in stream:
+                received.append(segment)
+                time.sleep(0.005)
+            return "final.wav"
+
+        self.translator.create_translated_audio_fixed = slow_tts
+
+        self.assertIsNone(self._run({'segments': broken(), 'language': 'en'}))
+        # TTS stops with the failure instead of dubbing the segments still queued
+        self.assertLess(len(received), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Tests for batched translation and what it writes to the translation cache
+"""
+
+import importlib
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Models and network services are never exercised here; stand in for any
+# heavy dependency that isn't installed so the module can be imported
+for _name in ("numpy", "librosa", "soundfile", "yt_dlp", "faster_whisper",
+              "deep_translator", "deep_translator.google", "gtts", "gtts.tts",
+              "pydub", "requests", "requests.adapters"):
+    try:
+        importlib.import_module(_name)
+    except ImportError:
+        sys.modules[_name] = mock.MagicMock()
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import complete_working_translator as cwt  # noqa: E402
+
+
+class _FakeTranslator:
+    """Upper-cases each line; ``reply`` overrides the answer for multi-line requests"""
+
+    def __init__(self, reply=None, single=None):
+        self.reply = reply
+        self.single = single or (lambda text: text.upper())
+        self.calls = []
+
+    def translate(self, text):
+        self.calls.append(text)
+        if "\n" in text:
+            return self.reply(text) if self.reply else text.upper()
+        return self.single(text)
+
+
+class TranslateBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(cwt, "BatchedInferencePipeline")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cwt.FixedYouTubeTranslator._MODEL = mock.MagicMock()
+        self.translator = cwt.FixedYouTubeTranslator(
+            output_dir=f"{self.tmp.name}/output", temp_dir=f"{self.tmp.name}/temp"
+        )
+
+    def tearDown(self):
+        self.translator._tcache.close()
+        self.tmp.cleanup()
+
+    def _use(self, fake):
+        self.translator._get_translator = lambda *args: fake
+        return fake
+
+    def _cached_values(self):
+        rows = self.translator._tcache.execute("SELECT translated FROM translations").fetchall()
+        return sorted(row[0] for row in rows)
+
+    def test_line_count_mismatch_falls_back_per_item(self):
+        fake = self._use(_FakeTranslator(reply=lambda text: "ONE MERGED LINE"))
+
+        results = self.translator._translate_batch(["one", "two", "three"], "es", "en")
+
+        self.assertEqual(results, ["ONE", "TWO", "THREE"])
+        self.assertEqual(fake.calls[1:], ["one", "two", "three"])
+        # Only the per-item translations are persisted, never the failed batch reply
+        self.assertEqual(self._cached_values(), ["ONE", "THREE", "TWO"])
+
+    def test_blank_reply_line_is_not_cached(self):
+        self._use(_FakeTranslator(
+            reply=lambda text: "UNO\n\nTRES",
+            single=lambda text: ""
+        ))
+
+        results = self.translator._translate_batch(["one", "two", "three"], "es", "en")
+
+        # The blank line keeps its source text but is never written to the cache
+        self.assertEqual(results, ["UNO", "two", "TRES"])
+        self.assertEqual(self._cached_values(), ["TRES", "UNO"])
+
+    def test_duplicate_texts_share_one_request(self):
+        fake = self._use(_FakeTranslator())
+
+        results = self.translator._translate_batch(["hi", "bye", "hi", "hi"], "es", "en")
+
+        self.assertEqual(results, ["HI", "BYE", "HI", "HI"])
+        self.assertEqual(fake.calls, ["hi\nbye"])
+
+    def test_cached_texts_are_not_requested_again(self):
+        fake = self._use(_FakeTranslator())
+        self.translator._translate_batch(["hi", "bye"], "es", "en")
+
+        self.translator._translate_batch(["hi", "bye"], "es", "en")
+
+        self.assertEqual(len(fake.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()